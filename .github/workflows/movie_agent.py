@@ -1,6 +1,7 @@
 import requests
 import feedparser
 import os
+import re
 import google.generativeai as genai
 from datetime import datetime, timezone
 
@@ -15,6 +16,9 @@ REDDIT_URL = "https://www.reddit.com/r/Steelbooks+4kbluray+boutiquebluray/search
 # 2. Slickdeals (Verified sales)
 SLICKDEALS_RSS = "https://slickdeals.net/newsearch.php?mode=popdeals&searcharea=deals&sort=newest&q=4k+blu-ray&rss=1"
 
+RSS_TRIGGERS = ["steelbook", "4k", "criterion", "sale", "price error"]
+TRIGGER_RE = re.compile("|".join(map(re.escape, RSS_TRIGGERS)), re.IGNORECASE)
+
 # --- AI SETUP ---
 if GEMINI_API_KEY:
     genai.configure(api_key=GEMINI_API_KEY)
@@ -74,9 +78,8 @@ def check_rss(name, url):
     print(f"--- Checking {name} ---")
     try:
         feed = feedparser.parse(url)
-        triggers = ["steelbook", "4k", "criterion", "sale", "price error"]
         for entry in feed.entries[:3]:
-            if any(w in entry.title.lower() for w in triggers):
+            if TRIGGER_RE.search(entry.title):
                  print(f"-> Match: {entry.title}")
                  send_discord_alert(name, entry.title, entry.link)
     except Exception as e:
@@ -1,139 +1,508 @@
-import requests
-import feedparser
+import asyncio
+import aiohttp
+import email.utils
+import functools
+import hashlib
+import html
+import json
 import os
-import google.generativeai as genai
-from datetime import datetime, timezone
+import pickle
+import re
+import time
+from io import BytesIO
+import orjson
+from lxml import etree
 
 # --- CONFIGURATION ---
 WEBHOOK_URL = os.environ.get("DISCORD_WEBHOOK_URL")
 GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
 USER_AGENT = "MovieglitchAI/3.0"
+# Discord allows ~30 webhook posts a minute; the connector's per-host cap keeps
+# only a few alerts in flight at once
+MAX_CONNECTIONS_PER_HOST = 5
+# A hung Reddit/Discord/Gemini call must not stall the cron job, so every
+# request is bounded and transient failures are retried with backoff.
+HTTP_TIMEOUT = aiohttp.ClientTimeout(total=10, connect=3)
+GEMINI_TIMEOUT = 30
+RETRY_TOTAL = 3
+RETRY_BACKOFF = 0.3
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+RETRY_AFTER_MAX = 10 # Give up rather than wait longer than this on a 429
+ALERT_TEMPLATE = "{emoji} **PROFIT OPPORTUNITY**\n**{title}**\n[View Link]({link})".format
 
-# --- TIME WINDOW (Crucial for Deduplication) ---
-# The bot runs every 5 minutes. We check the last 5 minutes.
-# This ensures we see each post exactly once (mostly).
-TIME_WINDOW_MINUTES = 5
+# --- DEDUPLICATION ---
+# Every post we process is remembered in seen.json (restored between runs by
+# actions/cache), so a late or skipped cron run can't drop or repeat alerts.
+# A post whose Discord alert fails is forgotten again, so the next run retries it.
+# We only look back SEEN_TTL_HOURS, as far as we remember; anything older may
+# have been forgotten.
+SEEN_FILE = "seen.json"
+SEEN_TTL_HOURS = 24
+# Without a seen.json (first deploy, cache miss, killed run) we can't tell old
+# posts from new ones: everything in the last SEEN_TTL_HOURS is recorded as seen,
+# but only posts from the last few minutes (one cron interval) alert.
+COLD_START_WINDOW_MINUTES = 5
+
+# ETag / Last-Modified from the previous run, so unchanged sources answer 304
+HTTP_CACHE_FILE = "http_cache.json"
 
 # --- SOURCES ---
+REDDIT_BASE = "https://www.reddit.com"
 REDDIT_URL = "https://www.reddit.com/r/Steelbooks+4kbluray+boutiquebluray/search.json?q=%22OOP%22+OR+%22Restock%22+OR+%22Glitch%22+OR+%22Misprice%22+OR+%22Steal%22&restrict_sr=on&sort=new&limit=10"
 SLICKDEALS_RSS = "https://slickdeals.net/newsearch.php?mode=popdeals&searcharea=deals&sort=newest&q=4k+blu-ray&rss=1"
 
+# RSS entries only alert if the title contains one of these (case-insensitive)
+RSS_TRIGGERS = ["glitch", "price error", "mistake"]
+TRIGGER_RE = re.compile("|".join(map(re.escape, RSS_TRIGGERS)), re.IGNORECASE)
+
 # --- AI SETUP ---
-if GEMINI_API_KEY:
+# The flipper rubric is fixed, so it lives in the system instruction and each
+# request only carries the post titles.
+RUBRIC = """
+You are a ruthless eBay flipper and arbitrage expert.
+You will be given numbered Reddit post titles.
+
+Your Goal: Identify items that can be bought and resold for a HIGH PROFIT.
+
+Criteria for YES:
+1. Is it a "Price Mistake" or "Glitch" (e.g. 90% off)?
+2. Is it a "Steelbook" restock (high collector value)?
+3. Is it "Out of Print" (OOP) or "Limited Edition"?
+4. Is the profit margin likely > $20?
+
+Criteria for NO:
+1. Standard sales (e.g. "Buy 2 Get 1 Free", "$5 off").
+2. Common movies that are not rare.
+3. Questions or Show-off posts (e.g. "Look what I bought").
+
+Answer YES only if it is a high-profit flip opportunity.
+Answer NO if it is just a regular deal or discussion.
+For each numbered title, answer on its own line as "<number>) YES" or "<number>) NO".
+"""
+# One answer line, e.g. "2) YES", "2) Alien 4K Steelbook: NO" or markdown like
+# "**2) NO**" / "- 2) NO". The verdict must be the last word, so titles like
+# "Eyes Wide Shut" can't be misread as YES.
+ANSWER_RE = re.compile(r"^[\s*#-]*(\d+)\)?.*\b(YES|NO)\b[\s.*]*$", re.IGNORECASE)
+
+# Titles matching these are obvious flips and skip Gemini entirely
+FAST_YES_RE = re.compile(r"price\s*error|glitch|\$0\.\d\d|misprice", re.IGNORECASE)
+
+# --- AI CACHE ---
+# Restocks get reposted with near-identical titles, so previous verdicts are
+# kept on disk (restored between runs by actions/cache) and reused instead of
+# asking Gemini again.
+AI_CACHE_FILE = "ai_cache.pkl"
+AI_CACHE_MAX_ENTRIES = 2000
+EMBED_MODEL = "models/text-embedding-004"
+SIMILARITY_THRESHOLD = 0.92
+
+# The Gemini SDK and numpy (only used by the AI cache) are heavy to import, so
+# they are only loaded on runs that actually have something to classify.
+@functools.lru_cache(maxsize=1)
+def get_genai():
+    import google.generativeai as genai
     genai.configure(api_key=GEMINI_API_KEY)
-    model = genai.GenerativeModel('gemini-1.5-flash')
+    return genai
 
-def analyze_profit_potential(title, subreddit):
+@functools.lru_cache(maxsize=1)
+def get_model():
+    return get_genai().GenerativeModel('gemini-1.5-flash', system_instruction=RUBRIC)
+
+def normalize_title(title):
+    """Lowercases and strips punctuation/extra spaces so trivial reposts match exactly."""
+    return " ".join(re.sub(r"[^\w$.%]+", " ", title.lower()).split())
+
+def load_ai_cache():
+    try:
+        with open(AI_CACHE_FILE, "rb") as f:
+            return pickle.load(f)
+    except Exception:
+        # Missing or unreadable cache just means a cold start
+        return {"exact": {}, "embeddings": None, "decisions": []}
+
+def save_ai_cache(cache):
+    # Keep only the newest entries so the file doesn't grow forever
+    if len(cache["decisions"]) > AI_CACHE_MAX_ENTRIES:
+        cache["embeddings"] = cache["embeddings"][-AI_CACHE_MAX_ENTRIES:]
+        cache["decisions"] = cache["decisions"][-AI_CACHE_MAX_ENTRIES:]
+    if len(cache["exact"]) > AI_CACHE_MAX_ENTRIES:
+        cache["exact"] = dict(list(cache["exact"].items())[-AI_CACHE_MAX_ENTRIES:])
+    try:
+        with open(AI_CACHE_FILE, "wb") as f:
+            pickle.dump(cache, f)
+    except Exception as e:
+        print(f"   [AI] Cache save error: {e}")
+
+def embed_titles(titles):
+    """Returns unit-length embeddings (one row per title), or None on failure."""
+    import numpy as np
+    try:
+        result = get_genai().embed_content(model=EMBED_MODEL, content=titles, request_options={"timeout": GEMINI_TIMEOUT})
+        vectors = np.array(result['embedding'], dtype=np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    except Exception as e:
+        print(f"   [AI] Embedding error: {e}")
+        return None
+
+def ask_gemini(candidates):
+    """
+    Sends a batch of (title, subreddit) to Gemini in a single call.
+    Returns one True/False per candidate, or None where Gemini gave no answer.
+    """
+    prompt = "\n".join(f"{i}) [r/{subreddit}] {title}" for i, (title, subreddit) in enumerate(candidates, 1))
+    
+    try:
+        response = get_model().generate_content(prompt, request_options={"timeout": GEMINI_TIMEOUT})
+        text = response.text
+    except Exception as e:
+        print(f"   [AI] Error: {e}")
+        return [None] * len(candidates)
+    
+    # Map answers by the index Gemini echoed back, not by line position, so a
+    # preamble or skipped line can't shift verdicts onto the wrong titles
+    answers = {}
+    for line in text.splitlines():
+        match = ANSWER_RE.match(line)
+        if match:
+            answers.setdefault(int(match.group(1)), match.group(2).upper())
+    
+    decisions = []
+    for i, (title, _) in enumerate(candidates, 1):
+        answer = answers.get(i)
+        print(f"   [AI] Profit Analysis of '{title}': {answer or 'no answer'}")
+        decisions.append(None if answer is None else answer == "YES")
+    return decisions
+
+def analyze_profit_potential(candidates):
     """
-    Asks Gemini: Will this item flip for a profit?
+    Asks Gemini: Will these items flip for a profit?
+    Takes a list of (title, subreddit) and returns one True/False per candidate.
+    Obvious price errors are a local YES, exact and near-duplicate titles are
+    answered from the cache, and the rest go to Gemini in a single call.
     """
-    if not GEMINI_API_KEY: return True # Fail open if no key
+    if not GEMINI_API_KEY: return [True] * len(candidates) # Fail open if no key
     
-    prompt = f"""
-    You are a ruthless eBay flipper and arbitrage expert.
-    Analyze this Reddit post title from r/{subreddit}: "{title}"
+    results = [True if FAST_YES_RE.search(title) else None for title, _ in candidates]
+    for (title, _), decision in zip(candidates, results):
+        if decision:
+            print(f"   [AI] Obvious flip, skipping Gemini: '{title}'")
+    if all(decision is not None for decision in results): return results
     
-    Your Goal: Identify items that can be bought and resold for a HIGH PROFIT.
+    import numpy as np
+    cache = load_ai_cache()
+    # Normalize (lowercase etc.) each title once; reused for lookup and storage
+    keys = [normalize_title(title) for title, _ in candidates]
+    for i, (title, _) in enumerate(candidates):
+        if results[i] is None and keys[i] in cache["exact"]:
+            results[i] = cache["exact"][keys[i]]
+            print(f"   [AI] Cached verdict for '{title}': {'YES' if results[i] else 'NO'}")
     
-    Criteria for YES:
-    1. Is it a "Price Mistake" or "Glitch" (e.g. 90% off)?
-    2. Is it a "Steelbook" restock (high collector value)?
-    3. Is it "Out of Print" (OOP) or "Limited Edition"?
-    4. Is the profit margin likely > $20?
+    misses = [i for i, decision in enumerate(results) if decision is None]
+    if not misses: return results
     
-    Criteria for NO:
-    1. Standard sales (e.g. "Buy 2 Get 1 Free", "$5 off").
-    2. Common movies that are not rare.
-    3. Questions or Show-off posts (e.g. "Look what I bought").
+    # Semantic layer: reuse the verdict of a close-enough previous title
+    vectors = embed_titles([candidates[i][0] for i in misses])
+    if vectors is not None and cache["embeddings"] is not None and len(cache["decisions"]):
+        scores = cache["embeddings"] @ vectors.T
+        for col, i in enumerate(misses):
+            best = int(scores[:, col].argmax())
+            if scores[best, col] >= SIMILARITY_THRESHOLD:
+                results[i] = cache["decisions"][best]
+                print(f"   [AI] Similar verdict for '{candidates[i][0]}': {'YES' if results[i] else 'NO'} ({scores[best, col]:.2f})")
     
-    Answer YES only if it is a high-profit flip opportunity.
-    Answer NO if it is just a regular deal or discussion.
-    Answer only one word.
-    """
+    pending = [i for i in misses if results[i] is None]
+    if pending:
+        verdicts = ask_gemini([candidates[i] for i in pending])
+        for i, decision in zip(pending, verdicts):
+            if decision is None:
+                results[i] = True # Fail open, but don't remember it
+                continue
+            results[i] = decision
+            cache["exact"][keys[i]] = decision
+            if vectors is not None:
+                row = vectors[misses.index(i)][None, :]
+                cache["embeddings"] = row if cache["embeddings"] is None else np.vstack([cache["embeddings"], row])
+                cache["decisions"].append(decision)
+        save_ai_cache(cache)
     
+    return results
+
+def seen_key(source, ident):
+    return hashlib.sha256(f"{source}|{ident}".encode()).hexdigest()[:16]
+
+def load_seen():
+    """
+    Returns {hash: first_seen_timestamp} for everything processed recently,
+    or None if no previous state could be loaded (cold start).
+    """
     try:
-        response = model.generate_content(prompt)
-        decision = response.text.strip().upper()
-        print(f"   [AI] Profit Analysis of '{title}': {decision}")
-        return "YES" in decision
+        with open(SEEN_FILE) as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+def save_seen(seen):
+    cutoff = time.time() - SEEN_TTL_HOURS * 3600
+    fresh = {h: ts for h, ts in seen.items() if ts >= cutoff}
+    try:
+        with open(SEEN_FILE, "w") as f:
+            json.dump(fresh, f)
     except Exception as e:
-        print(f"   [AI] Error: {e}")
-        return True 
+        print(f"Seen-set save error: {e}")
+
+def load_http_cache():
+    """Returns {url: [etag, last_modified]} from the previous run."""
+    try:
+        with open(HTTP_CACHE_FILE) as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+def save_http_cache(http_cache):
+    try:
+        with open(HTTP_CACHE_FILE, "w") as f:
+            json.dump(http_cache, f)
+    except Exception as e:
+        print(f"HTTP cache save error: {e}")
+
+async def request(session, method, url, **kwargs):
+    """
+    Sends a request, retrying 429/5xx and network errors with exponential
+    backoff (or the server's Retry-After on 429). Returns the final
+    (response, body); the caller decides what a bad status means.
+    Only GETs retry anything that can happen after the request was sent. A POST
+    only retries a 429 (not processed) or a failure to connect, since a 5xx or
+    a timeout may arrive after Discord already posted the alert.
+    """
+    if method == "GET":
+        retryable_statuses = RETRY_STATUSES
+        retryable_errors = (aiohttp.ClientConnectionError, asyncio.TimeoutError)
+    else:
+        retryable_statuses = {429}
+        retryable_errors = (aiohttp.ClientConnectorError, aiohttp.ConnectionTimeoutError)
+    
+    for attempt in range(RETRY_TOTAL + 1):
+        delay = RETRY_BACKOFF * 2 ** attempt
+        try:
+            async with session.request(method, url, **kwargs) as response:
+                body = await response.read()
+            if response.status not in retryable_statuses or attempt == RETRY_TOTAL:
+                return response, body
+            if response.status == 429 and "Retry-After" in response.headers:
+                try:
+                    delay = float(response.headers["Retry-After"])
+                except ValueError:
+                    pass
+                if delay > RETRY_AFTER_MAX:
+                    return response, body
+        except retryable_errors:
+            if attempt == RETRY_TOTAL:
+                raise
+        await asyncio.sleep(delay)
+
+async def fetch(session, url, http_cache):
+    """
+    Conditional GET. Returns the body, or None if the source hasn't changed
+    since the last run (HTTP 304).
+    """
+    etag, last_modified = http_cache.get(url, [None, None])
+    headers = {}
+    if etag: headers["If-None-Match"] = etag
+    if last_modified: headers["If-Modified-Since"] = last_modified
+    
+    response, body = await request(session, "GET", url, headers=headers)
+    if response.status == 304:
+        return None
+    response.raise_for_status()
+    http_cache[url] = [response.headers.get("ETag"), response.headers.get("Last-Modified")]
+    return body
 
-def send_discord_alert(source, title, link, is_verified=False):
+async def send_discord_alert(session, source, title, link, is_verified=False):
     if not WEBHOOK_URL: return
     
     emoji = "💰" # Money bag for profit
     if is_verified: emoji = "🤖" # Robot for AI verified
     
     data = {
-        "content": f"{emoji} **PROFIT OPPORTUNITY**\n**{title}**\n[View Link]({link})"
+        "content": ALERT_TEMPLATE(emoji=emoji, title=title, link=link)
     }
-    requests.post(WEBHOOK_URL, json=data)
+    response, _ = await request(session, "POST", WEBHOOK_URL, json=data)
+    # Surface a 429/5xx that outlived the retries so send_alerts logs it
+    response.raise_for_status()
 
-def check_reddit():
+async def send_alerts(session, alerts):
+    """
+    Posts queued (source, title, link, is_verified, seen_keys) alerts
+    concurrently (the session's connector limits how many are in flight).
+    Returns the alerts that could not be delivered.
+    """
+    results = await asyncio.gather(*(send_discord_alert(session, *alert[:4]) for alert in alerts), return_exceptions=True)
+    failed = []
+    for alert, result in zip(alerts, results):
+        if isinstance(result, Exception):
+            print(f"Discord Error for '{alert[1]}': {result}")
+            failed.append(alert)
+    return failed
+
+async def check_reddit(session, seen, http_cache, alert_since):
+    """Returns the alerts to send for fresh, profitable Reddit posts."""
     print("--- Checking Reddit ---")
-    headers = {"User-Agent": USER_AGENT}
+    alerts = []
     try:
-        response = requests.get(REDDIT_URL, headers=headers)
-        response.raise_for_status()
-        posts = response.json()['data']['children']
+        body = await fetch(session, REDDIT_URL, http_cache)
+        if body is None:
+            print("   Not modified since last run.")
+            return alerts
+        posts = orjson.loads(body)['data']['children']
         
+        candidates = []
+        cutoff = time.time() - SEEN_TTL_HOURS * 3600
         for post in posts:
             data = post['data']
-            # Strict Time Window Check
-            post_time = datetime.fromtimestamp(data['created_utc'], timezone.utc)
-            minutes_ago = (datetime.now(timezone.utc) - post_time).total_seconds() / 60
+            # Posts older than the seen-set memory are ignored. Results are
+            # sorted newest first, so everything after this is older too
+            if data['created_utc'] < cutoff:
+                break
             
-            # ONLY process if it falls in the exact window of the last run
-            if minutes_ago <= TIME_WINDOW_MINUTES:
-                print(f"-> Fresh Candidate: {data['title']}")
-                
-                # Ask the Brain
-                is_profitable = analyze_profit_potential(data['title'], data['subreddit'])
-                
-                if is_profitable:
-                    print("   -> HIGH PROFIT! Sending alert.")
-                    send_discord_alert(f"r/{data['subreddit']}", data['title'], f"https://www.reddit.com{data['permalink']}", is_verified=True)
-                else:
-                    print("   -> Ignored (Low Profit/Noise).")
+            # ONLY process posts we haven't handled on a previous run
+            key = seen_key("reddit", data['permalink'])
+            if key in seen:
+                continue
+            if data['created_utc'] < alert_since:
+                # Cold start: remember it, but it's too old to alert on
+                seen[key] = time.time()
+                continue
+            print(f"-> Fresh Candidate: {data['title']}")
+            candidates.append((key, data))
+        
+        # Ask the Brain once for the whole batch (off the event loop, it blocks)
+        verdicts = await asyncio.to_thread(analyze_profit_potential, [(d['title'], d['subreddit']) for _, d in candidates])
+        
+        for (key, data), is_profitable in zip(candidates, verdicts):
+            seen[key] = time.time()
+            if is_profitable:
+                print(f"   -> HIGH PROFIT! Sending alert: {data['title']}")
+                alerts.append((f"r/{data['subreddit']}", data['title'], REDDIT_BASE + data['permalink'], True, (key,)))
             else:
-                # We skip old posts silently to avoid duplicates
-                pass
+                print(f"   -> Ignored (Low Profit/Noise): {data['title']}")
 
     except Exception as e:
         print(f"Reddit Error: {e}")
+        # Make the next run refetch in full rather than trust a 304
+        http_cache.pop(REDDIT_URL, None)
+    return alerts
 
-def check_rss(name, url):
+# Any "&" that doesn't start an XML-predefined or numeric entity
+LOOSE_AMP_RE = re.compile(rb"&(?!(?:amp|lt|gt|quot|apos|#\d+|#x[0-9a-fA-F]+);)")
+# CDATA sections are literal text, so they're left alone (the capture group
+# keeps them in the split output)
+CDATA_RE = re.compile(rb"(<!\[CDATA\[.*?\]\]>)", re.DOTALL)
+
+def parse_rss_items(body, limit):
+    """
+    Streams the first `limit` <item>s out of an RSS 2.0 feed.
+    Returns (title, link, published_timestamp) tuples; the timestamp is None
+    when the item has no usable pubDate.
+    """
+    # Feeds often contain bare "&" (query strings) or HTML entities like &nbsp;
+    # that aren't valid XML. Escape those so the text survives intact (HTML
+    # entities are unescaped below), and let libxml2 recover from anything else.
+    parts = CDATA_RE.split(body)
+    parts[::2] = [LOOSE_AMP_RE.sub(b"&amp;", part) for part in parts[::2]]
+    body = b"".join(parts)
+    items = []
+    for _, item in etree.iterparse(BytesIO(body), tag="item", resolve_entities=False, recover=True):
+        parsed = email.utils.parsedate_tz(item.findtext("pubDate") or "")
+        published = email.utils.mktime_tz(parsed) if parsed else None
+        items.append((html.unescape(item.findtext("title") or ""), item.findtext("link") or "", published))
+        item.clear()
+        if len(items) >= limit:
+            break
+    return items
+
+async def check_rss(session, seen, http_cache, alert_since, name, url):
+    """Returns the alerts to send for fresh RSS entries matching a trigger."""
     print(f"--- Checking {name} ---")
+    alerts = []
     try:
-        feed = feedparser.parse(url)
-        # We need to filter RSS by time too, or we get duplicates.
-        # Slickdeals usually provides 'published_parsed'
+        body = await fetch(session, url, http_cache)
+        if body is None:
+            print("   Not modified since last run.")
+            return alerts
+        # Parsing is CPU-bound; run it off the event loop so Reddit keeps moving
+        items = await asyncio.to_thread(parse_rss_items, body, 5)
+        # We filter RSS by time too, so entries older than the seen-set memory
+        # can't come back as duplicates. Slickdeals usually provides a pubDate
         
-        for entry in feed.entries[:5]:
-            title = entry.title
-            link = entry.link
-            
+        cutoff = time.time() - SEEN_TTL_HOURS * 3600
+        for title, link, published in items:
             # RSS Time Handling is tricky. We try to find a timestamp.
-            if hasattr(entry, 'published_parsed'):
-                published_time = datetime.fromtimestamp(time.mktime(entry.published_parsed), timezone.utc)
-                minutes_ago = (datetime.now(timezone.utc) - published_time).total_seconds() / 60
+            if published is not None:
+                # The feed is sorted newest first, so the rest are older too
+                if published < cutoff:
+                    break
                 
-                if minutes_ago <= TIME_WINDOW_MINUTES:
-                     print(f"-> RSS Candidate: {title}")
-                     # For RSS, we assume it's a deal (Gemini doesn't read linked RSS content easily yet)
-                     # But we can still keyword filter for "Glitch" or "Error"
-                     triggers = ["glitch", "price error", "mistake"]
-                     if any(w in title.lower() for w in triggers):
-                         send_discord_alert(name, title, link)
+                # Slickdeals republishes deals with fresh timestamps (and sometimes
+                # new links), so an entry counts as seen if its link OR title was
+                keys = (seen_key(name, link), seen_key(name, normalize_title(title)))
+                if any(key in seen for key in keys):
+                    continue
+                for key in keys:
+                    seen[key] = time.time()
+                if published < alert_since:
+                    # Cold start: remember it, but it's too old to alert on
+                    continue
+                print(f"-> RSS Candidate: {title}")
+                # For RSS, we assume it's a deal (Gemini doesn't read linked RSS content easily yet)
+                # But we can still keyword filter for "Glitch" or "Error"
+                if TRIGGER_RE.search(title):
+                    alerts.append((name, title, link, False, keys))
             else:
                 # If no time data, we skip to be safe against spamming dupes
                 pass
                  
     except Exception as e:
         print(f"RSS Error for {name}: {e}")
+        http_cache.pop(url, None)
+    return alerts
+
+async def main():
+    seen = load_seen()
+    http_cache = load_http_cache()
+    cold_start = seen is None
+    alert_since = 0
+    if cold_start:
+        print(f"No {SEEN_FILE} found; only alerting on the last {COLD_START_WINDOW_MINUTES} minutes this run.")
+        seen = {}
+        alert_since = time.time() - COLD_START_WINDOW_MINUTES * 60
+        # A 304 would hide posts we never recorded, so refetch everything
+        http_cache = {}
+    # One session for Reddit, RSS and Discord so they share warm keep-alive connections
+    connector = aiohttp.TCPConnector(limit=8, limit_per_host=MAX_CONNECTIONS_PER_HOST)
+    async with aiohttp.ClientSession(connector=connector, timeout=HTTP_TIMEOUT, headers={"User-Agent": USER_AGENT}) as session:
+        # Both sources are pure network I/O, so fetch them concurrently
+        results = await asyncio.gather(
+            check_reddit(session, seen, http_cache, alert_since),
+            check_rss(session, seen, http_cache, alert_since, "Slickdeals", SLICKDEALS_RSS),
+        )
+        failed = await send_alerts(session, [alert for alerts in results for alert in alerts])
+    
+    # fetch() only leaves a source in http_cache if it was processed. If one
+    # failed on a cold start, its backlog was never recorded; stay cold next run
+    # rather than let a warm run alert on all of it.
+    if cold_start and not all(url in http_cache for url in (REDDIT_URL, SLICKDEALS_RSS)):
+        print(f"Not saving {SEEN_FILE}: a source failed during the cold start.")
+        return
+    
+    if failed:
+        # Forget undelivered posts and drop the validators, so the next run
+        # refetches them (no 304) and retries the alert
+        for alert in failed:
+            for key in alert[4]:
+                seen.pop(key, None)
+        http_cache.clear()
+    save_seen(seen)
+    save_http_cache(http_cache)
 
 if __name__ == "__main__":
-    check_reddit()
-    check_rss("Slickdeals", SLICKDEALS_RSS)
+    asyncio.run(main())